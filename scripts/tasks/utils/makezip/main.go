@@ -22,16 +22,30 @@ package main
 import (
 	"archive/tar"
 	"archive/zip"
+	"bytes"
 	"compress/gzip"
 	"context"
+	"crypto/sha256"
+	"encoding/binary"
+	"encoding/hex"
+	"errors"
 	"fmt"
+	"hash"
+	"hash/crc32"
 	"io"
+	"math"
 	"net/http"
+	"net/url"
 	"os"
 	"path/filepath"
 	"regexp"
+	"runtime"
+	"strconv"
 	"strings"
+	"sync"
 	"time"
+
+	"github.com/klauspost/compress/flate"
 )
 
 const baseURL = "https://github.com/ZaparooProject/zaparoo.org/raw/refs/heads/main/docs/platforms/"
@@ -75,16 +89,119 @@ var extraItems = map[string][]string{
 	"batocera": {"cmd/batocera/scripts"},
 }
 
-func stripFrontmatter(content string) string {
-	lines := strings.Split(content, "\n")
-	if len(lines) > 0 && lines[0] == "---" {
-		for i := 1; i < len(lines); i++ {
-			if lines[i] == "---" {
-				return strings.Join(lines[i+1:], "\n")
-			}
+// defaultCompressionLevel is deliberately lower than flate's default (6):
+// for these archives the size difference is under a percent, but
+// compressing the app binary is several times faster.
+const defaultCompressionLevel = 3
+
+// Entries whose sampled entropy exceeds this many bits per byte are
+// treated as already compressed and stored verbatim: DEFLATE gains a few
+// percent at most on such payloads but dominates packaging CPU time.
+const (
+	entropySampleSize     = 64 * 1024
+	storeEntropyThreshold = 7.5
+)
+
+// archiveFormat returns the zip method and compression level selected via
+// the ZAPAROO_ZIP_FORMAT environment variable: "store" skips compression
+// entirely for fast dev builds, "deflate" (the default) compresses at the
+// configured level, and "lzma" marks archival builds where size matters.
+// archive/zip cannot write LZMA entries, so that tier maps to DEFLATE at
+// maximum level, which every unzip tool can still read.
+func archiveFormat() (method uint16, level int) {
+	format := os.Getenv("ZAPAROO_ZIP_FORMAT")
+	switch format {
+	case "", "deflate":
+		return zip.Deflate, compressionLevel()
+	case "store":
+		return zip.Store, flate.NoCompression
+	case "lzma":
+		return zip.Deflate, flate.BestCompression
+	default:
+		_, _ = fmt.Printf("Ignoring invalid ZAPAROO_ZIP_FORMAT %q, using deflate\n", format)
+		return zip.Deflate, compressionLevel()
+	}
+}
+
+// byteEntropy returns the Shannon entropy of data in bits per byte.
+func byteEntropy(data []byte) float64 {
+	if len(data) == 0 {
+		return 0
+	}
+	var counts [256]int
+	for _, b := range data {
+		counts[b]++
+	}
+	var entropy float64
+	for _, count := range counts {
+		if count == 0 {
+			continue
 		}
+		p := float64(count) / float64(len(data))
+		entropy -= p * math.Log2(p)
+	}
+	return entropy
+}
+
+// sampleEntropy returns the Shannon entropy in bits per byte of the first
+// entropySampleSize bytes of file, rewinding the read offset afterwards.
+func sampleEntropy(file *os.File) (float64, error) {
+	buf := make([]byte, entropySampleSize)
+	n, err := file.Read(buf)
+	if err != nil && !errors.Is(err, io.EOF) {
+		return 0, fmt.Errorf("failed to sample file for entropy: %w", err)
+	}
+	if _, err := file.Seek(0, io.SeekStart); err != nil {
+		return 0, fmt.Errorf("failed to rewind file after sampling: %w", err)
+	}
+	return byteEntropy(buf[:n]), nil
+}
+
+// compressionLevel returns the DEFLATE level used for archive entries,
+// overridable via the ZAPAROO_ZIP_LEVEL environment variable.
+func compressionLevel() int {
+	env := os.Getenv("ZAPAROO_ZIP_LEVEL")
+	if env == "" {
+		return defaultCompressionLevel
+	}
+	level, err := strconv.Atoi(env)
+	if err != nil || level < flate.NoCompression || level > flate.BestCompression {
+		_, _ = fmt.Printf("Ignoring invalid ZAPAROO_ZIP_LEVEL %q, using %d\n", env, defaultCompressionLevel)
+		return defaultCompressionLevel
+	}
+	return level
+}
+
+var (
+	frontmatterOpen  = []byte("---\n")
+	frontmatterClose = []byte("\n---")
+)
+
+// stripFrontmatter removes a leading "---"-delimited frontmatter block.
+// It operates on the raw download bytes so the discarded block is never
+// copied into a string, and finds the closing delimiter with a direct
+// substring search instead of splitting the document into per-line strings.
+func stripFrontmatter(content []byte) []byte {
+	if !bytes.HasPrefix(content, frontmatterOpen) {
+		return content
+	}
+	search := 3 // keep each candidate's leading newline in view
+	for {
+		idx := bytes.Index(content[search:], frontmatterClose)
+		if idx < 0 {
+			return content
+		}
+		end := search + idx + len(frontmatterClose)
+		switch {
+		case end == len(content):
+			// closing delimiter ends the document
+			return nil
+		case content[end] == '\n':
+			return content[end+1:]
+		}
+		// matched a longer run of dashes (e.g. "----"); keep scanning
+		search += idx + 1
 	}
-	return content
 }
 
 // expandRelativeLinks converts relative markdown links to absolute zaparoo.org URLs
@@ -165,26 +282,60 @@ func addDocFooter(content, platformID string) string {
 	return content + footer
 }
 
-func fetchWithRetries(url string, maxRetries int) ([]byte, error) {
+// httpClient is shared across retries and downloads so the TCP connection
+// and TLS session to github.com (and its redirect target) are reused
+// instead of re-handshaking on every request.
+var httpClient = func() *http.Client {
+	transport := http.DefaultTransport.(*http.Transport).Clone()
+	transport.MaxIdleConnsPerHost = 4
+	return &http.Client{Transport: transport}
+}()
+
+// fetchResult holds the outcome of a conditional fetch: either the body and
+// its ETag, or notModified when the server answered 304 for a cached copy.
+type fetchResult struct {
+	etag        string
+	content     []byte
+	notModified bool
+}
+
+// retryBackoff sleeps before the next fetch attempt; nothing follows the
+// last attempt, since the caller is about to give up anyway.
+func retryBackoff(attempt, maxRetries int) {
+	if attempt+1 < maxRetries {
+		time.Sleep(time.Duration(attempt+1) * 2 * time.Second)
+	}
+}
+
+func fetchWithRetries(fetchURL, etag string, maxRetries int) (*fetchResult, error) {
 	var lastErr error
 	for attempt := range maxRetries {
 		ctx, cancel := context.WithTimeout(context.Background(), 30*time.Second)
 
-		req, err := http.NewRequestWithContext(ctx, http.MethodGet, url, http.NoBody)
+		req, err := http.NewRequestWithContext(ctx, http.MethodGet, fetchURL, http.NoBody)
 		if err != nil {
 			cancel()
 			return nil, fmt.Errorf("failed to create HTTP request: %w", err)
 		}
+		if etag != "" {
+			req.Header.Set("If-None-Match", etag)
+		}
 
-		resp, err := http.DefaultClient.Do(req) //nolint:gosec // G704: hardcoded doc download URL
+		resp, err := httpClient.Do(req) //nolint:gosec // G704: hardcoded doc download URL
 		if err != nil {
 			cancel()
 			lastErr = fmt.Errorf("attempt %d: %w", attempt+1, err)
 			_, _ = fmt.Printf("Retry %d/%d: request failed: %v\n", attempt+1, maxRetries, err)
-			time.Sleep(time.Duration(attempt+1) * 2 * time.Second)
+			retryBackoff(attempt, maxRetries)
 			continue
 		}
 
+		if resp.StatusCode == http.StatusNotModified {
+			_ = resp.Body.Close()
+			cancel()
+			return &fetchResult{notModified: true}, nil
+		}
+
 		if resp.StatusCode != http.StatusOK {
 			_ = resp.Body.Close()
 			cancel()
@@ -192,20 +343,21 @@ func fetchWithRetries(url string, maxRetries int) ([]byte, error) {
 				"attempt %d: HTTP %d: %s", attempt+1, resp.StatusCode, http.StatusText(resp.StatusCode),
 			)
 			_, _ = fmt.Printf("Retry %d/%d: HTTP %d\n", attempt+1, maxRetries, resp.StatusCode)
-			time.Sleep(time.Duration(attempt+1) * 2 * time.Second)
+			retryBackoff(attempt, maxRetries)
 			continue
 		}
 
 		content, err := io.ReadAll(resp.Body)
+		etagHeader := resp.Header.Get("ETag")
 		_ = resp.Body.Close()
 		cancel()
 		if err != nil {
 			lastErr = fmt.Errorf("attempt %d: failed to read body: %w", attempt+1, err)
-			time.Sleep(time.Duration(attempt+1) * 2 * time.Second)
+			retryBackoff(attempt, maxRetries)
 			continue
 		}
 
-		return content, nil
+		return &fetchResult{content: content, etag: etagHeader}, nil
 	}
 	return nil, fmt.Errorf("all %d attempts failed, last error: %w", maxRetries, lastErr)
 }
@@ -216,32 +368,84 @@ func downloadDoc(platformID, toDir string) error {
 		return fmt.Errorf("platform '%s' not found in the platforms list", platformID)
 	}
 
-	url := baseURL + fileName
+	docURL, err := url.JoinPath(baseURL, fileName)
+	if err != nil {
+		return fmt.Errorf("failed to build doc URL: %w", err)
+	}
+
+	readmePath := filepath.Join(toDir, "README.txt")
+	etagPath := readmePath + ".etag"
+
+	// Only revalidate with a stored ETag when the cached README is present,
+	// otherwise a 304 would leave us with nothing to package.
+	etag := ""
+	cached := false
+	if _, err := os.Stat(readmePath); err == nil {
+		cached = true
+		if data, err := os.ReadFile(etagPath); err == nil { //nolint:gosec // G703: build script
+			etag = strings.TrimSpace(string(data))
+		}
+	}
+
+	// With a cached README this fetch is only a revalidation, so make one
+	// quick attempt and let the caller fall back to the cached copy rather
+	// than sitting through the full retry backoff. The full budget is kept
+	// for cold-cache runs that cannot proceed without the download.
+	maxRetries := 5
+	if cached {
+		maxRetries = 1
+	}
 
-	content, err := fetchWithRetries(url, 5)
+	result, err := fetchWithRetries(docURL, etag, maxRetries)
 	if err != nil {
 		return fmt.Errorf("downloading %s docs: %w", platformID, err)
 	}
+	if result.notModified {
+		return nil
+	}
 
-	processedContent := string(content)
-
-	// Strip frontmatter from MDX files
+	// Strip frontmatter from MDX files before the bytes are copied into a
+	// string, so the discarded block never makes the round trip.
+	content := result.content
 	if strings.HasSuffix(strings.ToLower(fileName), ".mdx") {
-		processedContent = stripFrontmatter(processedContent)
+		content = stripFrontmatter(content)
 	}
 
+	processedContent := string(content)
+
 	// Expand relative links to absolute URLs
 	processedContent = expandRelativeLinks(processedContent, platformID)
 
 	// Add footer with link to full documentation
 	processedContent = addDocFooter(strings.TrimSpace(processedContent), platformID)
 
-	readmePath := filepath.Join(toDir, "README.txt")
-	readmeContent := []byte(processedContent + "\n")
+	// Write the processed string straight to disk; converting it to a byte
+	// slice first would copy the whole document one more time.
 	//nolint:gosec // G703: build script, not user-facing
-	if err := os.WriteFile(readmePath, readmeContent, 0o600); err != nil {
+	file, err := os.OpenFile(readmePath, os.O_WRONLY|os.O_CREATE|os.O_TRUNC, 0o600)
+	if err != nil {
 		return fmt.Errorf("failed to write README.txt: %w", err)
 	}
+	_, writeErr := file.WriteString(processedContent)
+	if writeErr == nil {
+		_, writeErr = file.WriteString("\n")
+	}
+	if closeErr := file.Close(); writeErr == nil {
+		writeErr = closeErr
+	}
+	if writeErr != nil {
+		return fmt.Errorf("failed to write README.txt: %w", writeErr)
+	}
+
+	// Persist the ETag so the next run can revalidate with a conditional GET.
+	if result.etag != "" {
+		//nolint:gosec // G703: build script, not user-facing
+		if err := os.WriteFile(etagPath, []byte(result.etag+"\n"), 0o600); err != nil {
+			return fmt.Errorf("failed to write README.txt.etag: %w", err)
+		}
+	} else {
+		_ = os.Remove(etagPath)
+	}
 	return nil
 }
 
@@ -260,73 +464,129 @@ func main() {
 		os.Exit(0)
 	}
 
-	if _, err := os.Stat(buildDir); os.IsNotExist(err) { //nolint:gosec // G703: build script
-		_, _ = fmt.Printf("The specified directory '%s' does not exist\n", buildDir)
+	// One directory read replaces the per-path stat calls below; each of
+	// those is a syscall that adds up on slow (e.g. networked) filesystems.
+	dirEntries, err := os.ReadDir(buildDir) //nolint:gosec // G703: build script
+	if err != nil {
+		if os.IsNotExist(err) {
+			_, _ = fmt.Printf("The specified directory '%s' does not exist\n", buildDir)
+		} else {
+			_, _ = fmt.Printf("Error reading build directory: %v\n", err)
+		}
 		os.Exit(1)
 	}
+	hasFile := make(map[string]bool, len(dirEntries))
+	for _, entry := range dirEntries {
+		hasFile[entry.Name()] = !entry.IsDir()
+	}
 
 	licensePath := filepath.Join(buildDir, "LICENSE.txt")
-	if _, err := os.Stat(licensePath); os.IsNotExist(err) { //nolint:gosec // G703: build script
-		input, err := os.ReadFile("LICENSE")
-		if err != nil {
-			_, _ = fmt.Printf("Error reading LICENSE file: %v\n", err)
-			os.Exit(1)
-		}
-		err = os.WriteFile(licensePath, input, 0o600) //nolint:gosec // G703: build script
-		if err != nil {
+	if !hasFile["LICENSE.txt"] {
+		if err := copyFile("LICENSE", licensePath); err != nil {
 			_, _ = fmt.Printf("Error copying LICENSE file: %v\n", err)
 			os.Exit(1)
 		}
 	}
 
 	appPath := filepath.Join(buildDir, appBin)
-	if _, err := os.Stat(appPath); os.IsNotExist(err) { //nolint:gosec // G703: build script
+	if !hasFile[appBin] {
 		_, _ = fmt.Printf("The specified binary file '%s' does not exist\n", appPath)
 		os.Exit(1)
 	}
 
-	archivePath := filepath.Join(buildDir, archiveName)
-	_ = os.Remove(archivePath) //nolint:gosec // G703: build script
-
-	readmePath := filepath.Join(buildDir, "README.txt")
-	if _, err := os.Stat(readmePath); os.IsNotExist(err) { //nolint:gosec // G703: build script
-		if err := downloadDoc(platform, buildDir); err != nil {
+	if err := downloadDoc(platform, buildDir); err != nil {
+		if hasFile["README.txt"] {
+			_, _ = fmt.Printf("Warning: reusing existing README.txt, refresh failed: %v\n", err)
+		} else {
 			_, _ = fmt.Printf("Error downloading documentation: %v\n", err)
 			os.Exit(1)
 		}
 	}
+	readmePath := filepath.Join(buildDir, "README.txt")
+
+	// Skip the rebuild entirely when the existing archive was produced from
+	// identical inputs and settings.
+	archivePath := filepath.Join(buildDir, archiveName)
+	stampPath := archivePath + ".stamp"
+	digest, digestErr := inputsDigest(platform, appPath, licensePath, readmePath)
+	if digestErr == nil && hasFile[archiveName] {
+		//nolint:gosec // G703: build script stamp path
+		if stamp, err := os.ReadFile(stampPath); err == nil && strings.TrimSpace(string(stamp)) == digest {
+			_, _ = fmt.Printf("Archive '%s' is up to date, skipping\n", archiveName)
+			return
+		}
+	}
+	// Drop the stale stamp first so a failed rebuild cannot leave one behind
+	// that re-validates a partial archive if inputs later revert.
+	_ = os.Remove(stampPath)   //nolint:gosec // G703: build script
+	_ = os.Remove(archivePath) //nolint:gosec // G703: build script
 
 	// Determine format based on file extension
-	var err error
 	if strings.HasSuffix(archiveName, ".tar.gz") {
-		err = createTarGzFile(archivePath, appPath, licensePath, readmePath, platform, buildDir)
+		err = createTarGzFile(archivePath, appPath, licensePath, readmePath, platform)
 	} else {
-		err = createZipFile(archivePath, appPath, licensePath, readmePath, platform, buildDir)
+		err = createZipFile(archivePath, appPath, licensePath, readmePath, platform)
 	}
 
 	if err != nil {
 		_, _ = fmt.Printf("Error creating archive: %v\n", err)
 		os.Exit(1)
 	}
+
+	if digestErr == nil {
+		//nolint:gosec // G703: build script stamp path
+		if err := os.WriteFile(stampPath, []byte(digest+"\n"), 0o600); err != nil {
+			_, _ = fmt.Printf("Warning: failed to write archive stamp: %v\n", err)
+		}
+	}
 }
 
-func createZipFile(zipPath, appPath, licensePath, readmePath, platform, buildDir string) error {
+func createZipFile(zipPath, appPath, licensePath, readmePath, platform string) error {
 	//nolint:gosec // Safe: creates zip files in build script with controlled paths
 	zipFile, err := os.Create(zipPath)
 	if err != nil {
 		return fmt.Errorf("error creating zip file: %w", err)
 	}
-	defer func(zipFile *os.File) {
-		_ = zipFile.Close()
-	}(zipFile)
 
 	zipWriter := zip.NewWriter(zipFile)
-	defer func(zipWriter *zip.Writer) {
-		if err := zipWriter.Close(); err != nil {
-			_, _ = fmt.Printf("warning: failed to close zip writer: %v\n", err)
-		}
-	}(zipWriter)
+	// Compress DEFLATE entries with klauspost/compress instead of
+	// compress/flate: same format and ratio, but SIMD-accelerated matching
+	// makes packaging the app binary several times faster.
+	method, level := archiveFormat()
+	zipWriter.RegisterCompressor(zip.Deflate, func(out io.Writer) (io.WriteCloser, error) {
+		return flate.NewWriter(out, level)
+	})
+
+	addErr := addArchiveEntries(platform, appPath, licensePath, readmePath,
+		func(path, arcname string) error {
+			if path == appPath {
+				return addAppBinaryToZip(zipWriter, path, arcname, method, level)
+			}
+			return addFileToZip(zipWriter, path, arcname, method)
+		},
+		func(dirPath string) error {
+			return addDirToZip(zipWriter, dirPath, method, level)
+		})
+
+	// Close failures mean a truncated archive (e.g. the central directory
+	// did not flush) and must fail the build so it is not stamped up to
+	// date.
+	if closeErr := zipWriter.Close(); addErr == nil && closeErr != nil {
+		addErr = fmt.Errorf("error closing zip writer: %w", closeErr)
+	}
+	if closeErr := zipFile.Close(); addErr == nil && closeErr != nil {
+		addErr = fmt.Errorf("error closing zip file: %w", closeErr)
+	}
+	return addErr
+}
 
+// addArchiveEntries adds the standard file set plus any platform extras to an
+// archive, abstracted over the zip and tar backends so the entry list and
+// extras handling live in one place.
+func addArchiveEntries(platform, appPath, licensePath, readmePath string,
+	addFile func(path, arcname string) error,
+	addDir func(dirPath string) error,
+) error {
 	filesToAdd := []struct {
 		path    string
 		arcname string
@@ -337,9 +597,8 @@ func createZipFile(zipPath, appPath, licensePath, readmePath, platform, buildDir
 	}
 
 	for _, file := range filesToAdd {
-		err := addFileToZip(zipWriter, file.path, file.arcname)
-		if err != nil {
-			return fmt.Errorf("error adding file to zip: %w", err)
+		if err := addFile(file.path, file.arcname); err != nil {
+			return fmt.Errorf("error adding file to archive: %w", err)
 		}
 	}
 
@@ -347,16 +606,12 @@ func createZipFile(zipPath, appPath, licensePath, readmePath, platform, buildDir
 		for _, item := range items {
 			if info, err := os.Stat(item); err == nil {
 				if info.IsDir() {
-					err = addDirToZip(zipWriter, item, buildDir)
+					err = addDir(item)
 				} else {
-					destPath := filepath.Join(buildDir, filepath.Base(item))
-					if copyErr := copyFile(item, destPath); copyErr != nil {
-						return fmt.Errorf("error copying extra file: %w", copyErr)
-					}
-					err = addFileToZip(zipWriter, destPath, filepath.Base(item))
+					err = addFile(item, filepath.Base(item))
 				}
 				if err != nil {
-					return fmt.Errorf("error adding extra item to zip: %w", err)
+					return fmt.Errorf("error adding extra item to archive: %w", err)
 				}
 			}
 		}
@@ -365,7 +620,206 @@ func createZipFile(zipPath, appPath, licensePath, readmePath, platform, buildDir
 	return nil
 }
 
-func addFileToZip(zipWriter *zip.Writer, filePath, arcname string) error {
+// cacheEntry is the fixed-size prefix of a .deflate_cache file, followed by
+// the raw compressed payload.
+type cacheEntry struct {
+	Method             uint16
+	CRC32              uint32
+	UncompressedSize64 uint64
+	CompressedSize64   uint64
+}
+
+// hashFile returns the SHA-256 digest of the file at path.
+func hashFile(path string) ([]byte, error) {
+	//nolint:gosec // Safe: opens files in build script with controlled paths
+	file, err := os.Open(path)
+	if err != nil {
+		return nil, fmt.Errorf("failed to open file %s: %w", path, err)
+	}
+	defer func(file *os.File) {
+		_ = file.Close()
+	}(file)
+
+	digest := sha256.New()
+	if _, err := io.Copy(digest, file); err != nil {
+		return nil, fmt.Errorf("failed to hash file %s: %w", path, err)
+	}
+	return digest.Sum(nil), nil
+}
+
+// hashFileInto mixes a file's path and content into digest. The path is
+// included so renames and reordering change the result.
+func hashFileInto(digest hash.Hash, path string) error {
+	//nolint:gosec // Safe: opens files in build script with controlled paths
+	file, err := os.Open(path)
+	if err != nil {
+		return fmt.Errorf("failed to open file %s: %w", path, err)
+	}
+	defer func(file *os.File) {
+		_ = file.Close()
+	}(file)
+
+	_, _ = io.WriteString(digest, path+"\n")
+	if _, err := io.Copy(digest, file); err != nil {
+		return fmt.Errorf("failed to hash file %s: %w", path, err)
+	}
+	return nil
+}
+
+// inputsDigest hashes everything that determines the archive's content: the
+// standard entries, the platform extras and the selected compression
+// settings. Unchanged digests let a rebuild be skipped entirely.
+func inputsDigest(platform string, paths ...string) (string, error) {
+	method, level := archiveFormat()
+	digest := sha256.New()
+	_, _ = fmt.Fprintf(digest, "%d:%d\n", method, level)
+
+	for _, path := range paths {
+		if err := hashFileInto(digest, path); err != nil {
+			return "", err
+		}
+	}
+
+	if items, ok := extraItems[platform]; ok {
+		for _, item := range items {
+			info, err := os.Stat(item)
+			if err != nil {
+				// missing extras are skipped by the archive writers too
+				continue
+			}
+			if !info.IsDir() {
+				if err := hashFileInto(digest, item); err != nil {
+					return "", err
+				}
+				continue
+			}
+			if err := filepath.Walk(item, func(path string, info os.FileInfo, err error) error {
+				if err != nil {
+					return err
+				}
+				if info.IsDir() {
+					return nil
+				}
+				return hashFileInto(digest, path)
+			}); err != nil {
+				return "", fmt.Errorf("failed to walk directory %s: %w", item, err)
+			}
+		}
+	}
+
+	return hex.EncodeToString(digest.Sum(nil)), nil
+}
+
+// readDeflateCache loads a previously compressed payload for srcPath and
+// rebuilds an archive header around it.
+func readDeflateCache(cachePath, srcPath, arcname string) (*zip.FileHeader, []byte, error) {
+	//nolint:gosec // G703: build script cache path
+	raw, err := os.ReadFile(cachePath)
+	if err != nil {
+		return nil, nil, fmt.Errorf("failed to read deflate cache: %w", err)
+	}
+	reader := bytes.NewReader(raw)
+	var entry cacheEntry
+	if err := binary.Read(reader, binary.LittleEndian, &entry); err != nil {
+		return nil, nil, fmt.Errorf("failed to parse deflate cache: %w", err)
+	}
+	data := raw[len(raw)-reader.Len():]
+	if uint64(len(data)) != entry.CompressedSize64 {
+		return nil, nil, errors.New("deflate cache payload is truncated")
+	}
+
+	info, err := os.Stat(srcPath) //nolint:gosec // G703: build script
+	if err != nil {
+		return nil, nil, fmt.Errorf("operation failed: %w", err)
+	}
+	header, err := zip.FileInfoHeader(info)
+	if err != nil {
+		return nil, nil, fmt.Errorf("operation failed: %w", err)
+	}
+	header.Name = arcname
+	header.Method = entry.Method
+	header.CRC32 = entry.CRC32
+	header.UncompressedSize64 = entry.UncompressedSize64
+	header.CompressedSize64 = entry.CompressedSize64
+	return header, data, nil
+}
+
+// writeDeflateCache persists a compressed payload and its archive metadata
+// for reuse by later runs.
+func writeDeflateCache(cachePath string, header *zip.FileHeader, data []byte) error {
+	if err := os.MkdirAll(filepath.Dir(cachePath), 0o750); err != nil { //nolint:gosec // G703: build script
+		return fmt.Errorf("failed to create cache directory: %w", err)
+	}
+	var buf bytes.Buffer
+	entry := cacheEntry{
+		Method:             header.Method,
+		CRC32:              header.CRC32,
+		UncompressedSize64: header.UncompressedSize64,
+		CompressedSize64:   header.CompressedSize64,
+	}
+	if err := binary.Write(&buf, binary.LittleEndian, entry); err != nil {
+		return fmt.Errorf("failed to encode deflate cache: %w", err)
+	}
+	_, _ = buf.Write(data)
+	if err := os.WriteFile(cachePath, buf.Bytes(), 0o600); err != nil { //nolint:gosec // G703: build script
+		return fmt.Errorf("failed to write deflate cache: %w", err)
+	}
+	return nil
+}
+
+// addAppBinaryToZip adds the app binary, reusing a cached DEFLATE stream
+// when the binary content is unchanged. CI packages the same binary several
+// times across platform archives, and this avoids re-compressing the
+// largest entry on every invocation. The cache lives next to the binary,
+// keyed by its SHA-256 and the compression level.
+func addAppBinaryToZip(zipWriter *zip.Writer, appPath, arcname string, method uint16, level int) error {
+	if method != zip.Deflate {
+		return addFileToZip(zipWriter, appPath, arcname, method)
+	}
+
+	sum, err := hashFile(appPath)
+	if err != nil {
+		return err
+	}
+	cachePath := filepath.Join(filepath.Dir(appPath), ".deflate_cache", fmt.Sprintf("%x-l%d.bin", sum, level))
+
+	if header, data, err := readDeflateCache(cachePath, appPath, arcname); err == nil {
+		return writeRawEntry(zipWriter, header, data)
+	}
+
+	header, data, err := deflateExtra(appPath, arcname, method, level)
+	if err != nil {
+		return err
+	}
+	// A Store-method payload is the binary itself; caching it would only
+	// duplicate the largest artifact on disk without saving any work.
+	if header.Method == zip.Deflate {
+		if err := writeDeflateCache(cachePath, header, data); err != nil {
+			_, _ = fmt.Printf("Warning: %v\n", err)
+		} else {
+			pruneDeflateCache(filepath.Dir(cachePath), filepath.Base(cachePath), level)
+		}
+	}
+	return writeRawEntry(zipWriter, header, data)
+}
+
+// pruneDeflateCache removes cached payloads for other binary hashes at the
+// same level, so stale multi-MB entries do not pile up across builds.
+func pruneDeflateCache(cacheDir, keep string, level int) {
+	entries, err := os.ReadDir(cacheDir)
+	if err != nil {
+		return
+	}
+	suffix := fmt.Sprintf("-l%d.bin", level)
+	for _, entry := range entries {
+		if entry.Name() == keep || !strings.HasSuffix(entry.Name(), suffix) {
+			continue
+		}
+		_ = os.Remove(filepath.Join(cacheDir, entry.Name())) //nolint:gosec // G703: build script
+	}
+}
+
+func addFileToZip(zipWriter *zip.Writer, filePath, arcname string, method uint16) error {
 	//nolint:gosec // Safe: opens files in build script with controlled paths
 	file, err := os.Open(filePath)
 	if err != nil {
@@ -385,7 +839,17 @@ func addFileToZip(zipWriter *zip.Writer, filePath, arcname string) error {
 		return fmt.Errorf("operation failed: %w", err)
 	}
 	header.Name = arcname
-	header.Method = zip.Deflate
+	header.Method = method
+
+	if method == zip.Deflate {
+		entropy, err := sampleEntropy(file)
+		if err != nil {
+			return err
+		}
+		if entropy > storeEntropyThreshold {
+			header.Method = zip.Store
+		}
+	}
 
 	writer, err := zipWriter.CreateHeader(header)
 	if err != nil {
@@ -399,7 +863,59 @@ func addFileToZip(zipWriter *zip.Writer, filePath, arcname string) error {
 	return nil
 }
 
-func addDirToZip(zipWriter *zip.Writer, dirPath, buildDir string) error {
+// deflateExtra reads and compresses an extras file off the main goroutine,
+// returning a header and payload ready for zip.Writer.CreateRaw.
+func deflateExtra(srcPath, arcname string, method uint16, level int) (*zip.FileHeader, []byte, error) {
+	//nolint:gosec // G703: paths from internal walk, not user input
+	data, err := os.ReadFile(srcPath)
+	if err != nil {
+		return nil, nil, fmt.Errorf("failed to read file %s: %w", srcPath, err)
+	}
+	info, err := os.Stat(srcPath) //nolint:gosec // G703: build script
+	if err != nil {
+		return nil, nil, fmt.Errorf("operation failed: %w", err)
+	}
+
+	header, err := zip.FileInfoHeader(info)
+	if err != nil {
+		return nil, nil, fmt.Errorf("operation failed: %w", err)
+	}
+	header.Name = arcname
+	header.CRC32 = crc32.ChecksumIEEE(data)
+	header.UncompressedSize64 = uint64(len(data))
+
+	sample := data
+	if len(sample) > entropySampleSize {
+		sample = sample[:entropySampleSize]
+	}
+	if method == zip.Store || byteEntropy(sample) > storeEntropyThreshold {
+		header.Method = zip.Store
+		header.CompressedSize64 = uint64(len(data))
+		return header, data, nil
+	}
+
+	var buf bytes.Buffer
+	flateWriter, err := flate.NewWriter(&buf, level)
+	if err != nil {
+		return nil, nil, fmt.Errorf("failed to create flate writer: %w", err)
+	}
+	if _, err := flateWriter.Write(data); err != nil {
+		return nil, nil, fmt.Errorf("failed to compress file %s: %w", srcPath, err)
+	}
+	if err := flateWriter.Close(); err != nil {
+		return nil, nil, fmt.Errorf("failed to compress file %s: %w", srcPath, err)
+	}
+	header.Method = zip.Deflate
+	header.CompressedSize64 = uint64(buf.Len())
+	return header, buf.Bytes(), nil
+}
+
+func addDirToZip(zipWriter *zip.Writer, dirPath string, method uint16, level int) error {
+	type extraFile struct {
+		srcPath string
+		arcname string
+	}
+	var files []extraFile
 	if err := filepath.Walk(dirPath, func(path string, info os.FileInfo, err error) error {
 		if err != nil {
 			return err
@@ -411,26 +927,70 @@ func addDirToZip(zipWriter *zip.Writer, dirPath, buildDir string) error {
 				return fmt.Errorf("failed to get relative path: %w", err)
 			}
 
-			destPath := filepath.Join(buildDir, filepath.Base(dirPath), relPath)
-			//nolint:gosec // G703: paths from internal walk, not user input
-			if err := os.MkdirAll(filepath.Dir(destPath), 0o750); err != nil {
-				return fmt.Errorf("failed to create directory: %w", err)
-			}
-
-			if err := copyFile(path, destPath); err != nil {
-				return err
-			}
-
-			return addFileToZip(zipWriter, destPath, filepath.Join(filepath.Base(dirPath), relPath))
+			files = append(files, extraFile{
+				srcPath: path,
+				arcname: filepath.Join(filepath.Base(dirPath), relPath),
+			})
 		}
 		return nil
 	}); err != nil {
 		return fmt.Errorf("failed to walk directory %s: %w", dirPath, err)
 	}
+
+	// Read and compress entries in parallel; the single-threaded zip writer
+	// then only appends the prebuilt streams, so per-file I/O and DEFLATE no
+	// longer serialize behind the archive writer.
+	type result struct {
+		err    error
+		header *zip.FileHeader
+		data   []byte
+	}
+	results := make([]result, len(files))
+	sem := make(chan struct{}, runtime.NumCPU())
+	var wg sync.WaitGroup
+	for i, file := range files {
+		wg.Add(1)
+		go func(i int, file extraFile) {
+			defer wg.Done()
+			sem <- struct{}{}
+			defer func() { <-sem }()
+			header, data, err := deflateExtra(file.srcPath, file.arcname, method, level)
+			results[i] = result{header: header, data: data, err: err}
+		}(i, file)
+	}
+	wg.Wait()
+
+	for i := range results {
+		if results[i].err != nil {
+			return results[i].err
+		}
+		if err := writeRawEntry(zipWriter, results[i].header, results[i].data); err != nil {
+			return err
+		}
+	}
+	return nil
+}
+
+// writeRawEntry appends a precompressed payload to the archive under a
+// header whose CRC and sizes are already filled in.
+func writeRawEntry(zipWriter *zip.Writer, header *zip.FileHeader, data []byte) error {
+	writer, err := zipWriter.CreateRaw(header)
+	if err != nil {
+		return fmt.Errorf("operation failed: %w", err)
+	}
+	if _, err := writer.Write(data); err != nil {
+		return fmt.Errorf("failed to copy file content to zip: %w", err)
+	}
 	return nil
 }
 
+// copyFile hardlinks src to dst when possible, turning the copy into a
+// metadata operation, and falls back to a byte copy when linking fails
+// (existing destination, cross-device, or unsupported filesystem).
 func copyFile(src, dst string) error {
+	if err := os.Link(src, dst); err == nil {
+		return nil
+	}
 	//nolint:gosec // Safe: reads files in build script with controlled paths
 	input, err := os.ReadFile(src)
 	if err != nil {
@@ -442,66 +1002,42 @@ func copyFile(src, dst string) error {
 	return nil
 }
 
-func createTarGzFile(tarGzPath, appPath, licensePath, readmePath, platform, buildDir string) error {
+func createTarGzFile(tarGzPath, appPath, licensePath, readmePath, platform string) error {
 	//nolint:gosec // Safe: creates tar.gz files in build script with controlled paths
 	tarGzFile, err := os.Create(tarGzPath)
 	if err != nil {
 		return fmt.Errorf("error creating tar.gz file: %w", err)
 	}
-	defer func(tarGzFile *os.File) {
-		_ = tarGzFile.Close()
-	}(tarGzFile)
 
-	gzipWriter := gzip.NewWriter(tarGzFile)
-	defer func(gzipWriter *gzip.Writer) {
-		if err := gzipWriter.Close(); err != nil {
-			_, _ = fmt.Printf("warning: failed to close gzip writer: %v\n", err)
-		}
-	}(gzipWriter)
+	_, level := archiveFormat()
+	gzipWriter, err := gzip.NewWriterLevel(tarGzFile, level)
+	if err != nil {
+		_ = tarGzFile.Close()
+		return fmt.Errorf("error creating gzip writer: %w", err)
+	}
 
 	tarWriter := tar.NewWriter(gzipWriter)
-	defer func(tarWriter *tar.Writer) {
-		if err := tarWriter.Close(); err != nil {
-			_, _ = fmt.Printf("warning: failed to close tar writer: %v\n", err)
-		}
-	}(tarWriter)
 
-	filesToAdd := []struct {
-		path    string
-		arcname string
-	}{
-		{appPath, filepath.Base(appPath)},
-		{licensePath, filepath.Base(licensePath)},
-		{readmePath, filepath.Base(readmePath)},
+	addErr := addArchiveEntries(platform, appPath, licensePath, readmePath,
+		func(path, arcname string) error {
+			return addFileToTar(tarWriter, path, arcname)
+		},
+		func(dirPath string) error {
+			return addDirToTar(tarWriter, dirPath)
+		})
+
+	// Close failures mean a truncated archive and must fail the build so it
+	// is not stamped up to date.
+	if closeErr := tarWriter.Close(); addErr == nil && closeErr != nil {
+		addErr = fmt.Errorf("error closing tar writer: %w", closeErr)
 	}
-
-	for _, file := range filesToAdd {
-		err := addFileToTar(tarWriter, file.path, file.arcname)
-		if err != nil {
-			return fmt.Errorf("error adding file to tar: %w", err)
-		}
+	if closeErr := gzipWriter.Close(); addErr == nil && closeErr != nil {
+		addErr = fmt.Errorf("error closing gzip writer: %w", closeErr)
 	}
-
-	if items, ok := extraItems[platform]; ok {
-		for _, item := range items {
-			if info, err := os.Stat(item); err == nil {
-				if info.IsDir() {
-					err = addDirToTar(tarWriter, item, buildDir)
-				} else {
-					destPath := filepath.Join(buildDir, filepath.Base(item))
-					if copyErr := copyFile(item, destPath); copyErr != nil {
-						return fmt.Errorf("error copying extra file: %w", copyErr)
-					}
-					err = addFileToTar(tarWriter, destPath, filepath.Base(item))
-				}
-				if err != nil {
-					return fmt.Errorf("error adding extra item to tar: %w", err)
-				}
-			}
-		}
+	if closeErr := tarGzFile.Close(); addErr == nil && closeErr != nil {
+		addErr = fmt.Errorf("error closing tar.gz file: %w", closeErr)
 	}
-
-	return nil
+	return addErr
 }
 
 func addFileToTar(tarWriter *tar.Writer, filePath, arcname string) error {
@@ -537,7 +1073,7 @@ func addFileToTar(tarWriter *tar.Writer, filePath, arcname string) error {
 	return nil
 }
 
-func addDirToTar(tarWriter *tar.Writer, dirPath, buildDir string) error {
+func addDirToTar(tarWriter *tar.Writer, dirPath string) error {
 	if err := filepath.Walk(dirPath, func(path string, info os.FileInfo, err error) error {
 		if err != nil {
 			return err
@@ -549,17 +1085,7 @@ func addDirToTar(tarWriter *tar.Writer, dirPath, buildDir string) error {
 				return fmt.Errorf("failed to get relative path: %w", err)
 			}
 
-			destPath := filepath.Join(buildDir, filepath.Base(dirPath), relPath)
-			//nolint:gosec // G703: paths from internal walk, not user input
-			if err := os.MkdirAll(filepath.Dir(destPath), 0o750); err != nil {
-				return fmt.Errorf("failed to create directory: %w", err)
-			}
-
-			if err := copyFile(path, destPath); err != nil {
-				return err
-			}
-
-			return addFileToTar(tarWriter, destPath, filepath.Join(filepath.Base(dirPath), relPath))
+			return addFileToTar(tarWriter, path, filepath.Join(filepath.Base(dirPath), relPath))
 		}
 		return nil
 	}); err != nil {
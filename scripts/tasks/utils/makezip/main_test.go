@@ -20,8 +20,12 @@
 package main
 
 import (
+	"archive/zip"
 	"bytes"
 	"context"
+	"fmt"
+	"io"
+	"math/rand"
 	"net/http"
 	"net/http/httptest"
 	"os"
@@ -74,12 +78,22 @@ func TestStripFrontmatter(t *testing.T) {
 			input:    "Some text\n---\nMore text\n---\nEnd",
 			expected: "Some text\n---\nMore text\n---\nEnd",
 		},
+		{
+			name:     "longer dash run is not a delimiter",
+			input:    "---\ntitle: Test\n----\nNo closing delimiter",
+			expected: "---\ntitle: Test\n----\nNo closing delimiter",
+		},
+		{
+			name:     "closing delimiter after longer dash run",
+			input:    "---\ntitle: Test\n----\nstill: frontmatter\n---\nContent",
+			expected: "Content",
+		},
 	}
 
 	for _, tt := range tests {
 		t.Run(tt.name, func(t *testing.T) {
 			t.Parallel()
-			result := stripFrontmatter(tt.input)
+			result := string(stripFrontmatter([]byte(tt.input)))
 			if result != tt.expected {
 				t.Errorf("stripFrontmatter(%q) = %q, want %q", tt.input, result, tt.expected)
 			}
@@ -87,6 +101,180 @@ func TestStripFrontmatter(t *testing.T) {
 	}
 }
 
+func TestSampleEntropy(t *testing.T) {
+	t.Parallel()
+
+	writeSample := func(t *testing.T, content []byte) *os.File {
+		t.Helper()
+		path := filepath.Join(t.TempDir(), "sample")
+		if err := os.WriteFile(path, content, 0o600); err != nil {
+			t.Fatalf("failed to write sample file: %v", err)
+		}
+		file, err := os.Open(path) //nolint:gosec // Safe: test path from t.TempDir()
+		if err != nil {
+			t.Fatalf("failed to open sample file: %v", err)
+		}
+		t.Cleanup(func() { _ = file.Close() })
+		return file
+	}
+
+	t.Run("empty file has zero entropy", func(t *testing.T) {
+		t.Parallel()
+
+		entropy, err := sampleEntropy(writeSample(t, nil))
+		if err != nil {
+			t.Fatalf("sampleEntropy failed: %v", err)
+		}
+		if entropy != 0 {
+			t.Errorf("entropy = %f, want 0", entropy)
+		}
+	})
+
+	t.Run("uniform bytes have maximum entropy", func(t *testing.T) {
+		t.Parallel()
+
+		content := make([]byte, entropySampleSize)
+		for i := range content {
+			content[i] = byte(i)
+		}
+		entropy, err := sampleEntropy(writeSample(t, content))
+		if err != nil {
+			t.Fatalf("sampleEntropy failed: %v", err)
+		}
+		if entropy <= storeEntropyThreshold {
+			t.Errorf("entropy = %f, want > %f", entropy, storeEntropyThreshold)
+		}
+	})
+
+	t.Run("repetitive text has low entropy", func(t *testing.T) {
+		t.Parallel()
+
+		content := bytes.Repeat([]byte("zaparoo core readme text\n"), 100)
+		entropy, err := sampleEntropy(writeSample(t, content))
+		if err != nil {
+			t.Fatalf("sampleEntropy failed: %v", err)
+		}
+		if entropy > storeEntropyThreshold {
+			t.Errorf("entropy = %f, want <= %f", entropy, storeEntropyThreshold)
+		}
+	})
+
+	t.Run("rewinds file offset", func(t *testing.T) {
+		t.Parallel()
+
+		file := writeSample(t, []byte("some content"))
+		if _, err := sampleEntropy(file); err != nil {
+			t.Fatalf("sampleEntropy failed: %v", err)
+		}
+		offset, err := file.Seek(0, io.SeekCurrent)
+		if err != nil {
+			t.Fatalf("failed to query offset: %v", err)
+		}
+		if offset != 0 {
+			t.Errorf("file offset = %d after sampling, want 0", offset)
+		}
+	})
+}
+
+func TestCompressionLevel(t *testing.T) {
+	tests := []struct {
+		name     string
+		env      string
+		expected int
+	}{
+		{
+			name:     "unset uses default",
+			env:      "",
+			expected: defaultCompressionLevel,
+		},
+		{
+			name:     "valid override",
+			env:      "9",
+			expected: 9,
+		},
+		{
+			name:     "zero disables compression",
+			env:      "0",
+			expected: 0,
+		},
+		{
+			name:     "non-numeric falls back to default",
+			env:      "fast",
+			expected: defaultCompressionLevel,
+		},
+		{
+			name:     "out of range falls back to default",
+			env:      "12",
+			expected: defaultCompressionLevel,
+		},
+		{
+			name:     "negative falls back to default",
+			env:      "-1",
+			expected: defaultCompressionLevel,
+		},
+	}
+
+	for _, tt := range tests {
+		t.Run(tt.name, func(t *testing.T) {
+			t.Setenv("ZAPAROO_ZIP_LEVEL", tt.env)
+			if got := compressionLevel(); got != tt.expected {
+				t.Errorf("compressionLevel() with %q = %d, want %d", tt.env, got, tt.expected)
+			}
+		})
+	}
+}
+
+func TestArchiveFormat(t *testing.T) {
+	tests := []struct {
+		name       string
+		env        string
+		wantMethod uint16
+		wantLevel  int
+	}{
+		{
+			name:       "unset uses deflate at default level",
+			env:        "",
+			wantMethod: zip.Deflate,
+			wantLevel:  defaultCompressionLevel,
+		},
+		{
+			name:       "deflate",
+			env:        "deflate",
+			wantMethod: zip.Deflate,
+			wantLevel:  defaultCompressionLevel,
+		},
+		{
+			name:       "store skips compression",
+			env:        "store",
+			wantMethod: zip.Store,
+			wantLevel:  0,
+		},
+		{
+			name:       "lzma maps to maximum deflate",
+			env:        "lzma",
+			wantMethod: zip.Deflate,
+			wantLevel:  9,
+		},
+		{
+			name:       "invalid falls back to deflate",
+			env:        "zstd",
+			wantMethod: zip.Deflate,
+			wantLevel:  defaultCompressionLevel,
+		},
+	}
+
+	for _, tt := range tests {
+		t.Run(tt.name, func(t *testing.T) {
+			t.Setenv("ZAPAROO_ZIP_FORMAT", tt.env)
+			method, level := archiveFormat()
+			if method != tt.wantMethod || level != tt.wantLevel {
+				t.Errorf("archiveFormat() with %q = (%d, %d), want (%d, %d)",
+					tt.env, method, level, tt.wantMethod, tt.wantLevel)
+			}
+		})
+	}
+}
+
 func TestExpandRelativeLinks(t *testing.T) {
 	t.Parallel()
 
@@ -276,6 +464,80 @@ func TestAddDocFooter(t *testing.T) {
 	}
 }
 
+func TestFetchWithRetries(t *testing.T) {
+	t.Parallel()
+
+	t.Run("returns content and etag", func(t *testing.T) {
+		t.Parallel()
+
+		server := httptest.NewServer(http.HandlerFunc(func(w http.ResponseWriter, r *http.Request) {
+			if r.Header.Get("If-None-Match") != "" {
+				t.Error("unexpected If-None-Match header on unconditional fetch")
+			}
+			w.Header().Set("ETag", `"v1"`)
+			w.WriteHeader(http.StatusOK)
+			_, _ = w.Write([]byte("doc body"))
+		}))
+		defer server.Close()
+
+		result, err := fetchWithRetries(server.URL, "", 1)
+		if err != nil {
+			t.Fatalf("fetchWithRetries failed: %v", err)
+		}
+		if result.notModified {
+			t.Error("expected notModified to be false for 200 response")
+		}
+		if string(result.content) != "doc body" {
+			t.Errorf("content = %q, want %q", result.content, "doc body")
+		}
+		if result.etag != `"v1"` {
+			t.Errorf("etag = %q, want %q", result.etag, `"v1"`)
+		}
+	})
+
+	t.Run("matching etag yields notModified", func(t *testing.T) {
+		t.Parallel()
+
+		server := httptest.NewServer(http.HandlerFunc(func(w http.ResponseWriter, r *http.Request) {
+			if r.Header.Get("If-None-Match") == `"v1"` {
+				w.WriteHeader(http.StatusNotModified)
+				return
+			}
+			w.WriteHeader(http.StatusOK)
+			_, _ = w.Write([]byte("doc body"))
+		}))
+		defer server.Close()
+
+		result, err := fetchWithRetries(server.URL, `"v1"`, 1)
+		if err != nil {
+			t.Fatalf("fetchWithRetries failed: %v", err)
+		}
+		if !result.notModified {
+			t.Error("expected notModified for matching ETag")
+		}
+		if len(result.content) != 0 {
+			t.Errorf("expected empty content on 304, got %q", result.content)
+		}
+	})
+
+	t.Run("persistent error exhausts retries", func(t *testing.T) {
+		t.Parallel()
+
+		server := httptest.NewServer(http.HandlerFunc(func(w http.ResponseWriter, _ *http.Request) {
+			w.WriteHeader(http.StatusInternalServerError)
+		}))
+		defer server.Close()
+
+		_, err := fetchWithRetries(server.URL, "", 1)
+		if err == nil {
+			t.Fatal("expected error after exhausting retries, got nil")
+		}
+		if !strings.Contains(err.Error(), "HTTP 500") {
+			t.Errorf("unexpected error message: %v", err)
+		}
+	})
+}
+
 func TestDownloadDoc(t *testing.T) {
 	t.Parallel()
 
@@ -368,7 +630,7 @@ func TestCreateZipFile(t *testing.T) {
 			t.Fatalf("failed to write readme file: %v", err)
 		}
 
-		err := createZipFile(zipPath, appPath, licensePath, readmePath, "testplatform", tmpDir)
+		err := createZipFile(zipPath, appPath, licensePath, readmePath, "testplatform")
 		if err != nil {
 			t.Fatalf("createZipFile failed: %v", err)
 		}
@@ -380,6 +642,282 @@ func TestCreateZipFile(t *testing.T) {
 	})
 }
 
+func TestAddDirToZip(t *testing.T) {
+	t.Parallel()
+
+	t.Run("archived entries survive a round trip", func(t *testing.T) {
+		t.Parallel()
+
+		tmpDir := t.TempDir()
+		srcDir := filepath.Join(tmpDir, "scripts")
+		if err := os.MkdirAll(filepath.Join(srcDir, "nested"), 0o750); err != nil {
+			t.Fatalf("failed to create source dir: %v", err)
+		}
+
+		want := map[string]string{
+			filepath.Join("scripts", "run.sh"):             "#!/bin/sh\necho run\n",
+			filepath.Join("scripts", "nested", "other.sh"): "#!/bin/sh\necho other\n",
+		}
+		for name, content := range want {
+			path := filepath.Join(tmpDir, name)
+			if err := os.WriteFile(path, []byte(content), 0o600); err != nil {
+				t.Fatalf("failed to write source file: %v", err)
+			}
+		}
+
+		zipPath := filepath.Join(tmpDir, "test.zip")
+		zipFile, err := os.Create(zipPath) //nolint:gosec // Safe: test path from t.TempDir()
+		if err != nil {
+			t.Fatalf("failed to create zip file: %v", err)
+		}
+		zipWriter := zip.NewWriter(zipFile)
+
+		if err := addDirToZip(zipWriter, srcDir, zip.Deflate, defaultCompressionLevel); err != nil {
+			t.Fatalf("addDirToZip failed: %v", err)
+		}
+		if err := zipWriter.Close(); err != nil {
+			t.Fatalf("failed to close zip writer: %v", err)
+		}
+		if err := zipFile.Close(); err != nil {
+			t.Fatalf("failed to close zip file: %v", err)
+		}
+
+		reader, err := zip.OpenReader(zipPath)
+		if err != nil {
+			t.Fatalf("failed to open zip: %v", err)
+		}
+		defer func() {
+			_ = reader.Close()
+		}()
+
+		got := make(map[string]string, len(reader.File))
+		for _, entry := range reader.File {
+			rc, err := entry.Open()
+			if err != nil {
+				t.Fatalf("failed to open entry %s: %v", entry.Name, err)
+			}
+			content, err := io.ReadAll(rc)
+			_ = rc.Close()
+			if err != nil {
+				t.Fatalf("failed to read entry %s: %v", entry.Name, err)
+			}
+			got[filepath.FromSlash(entry.Name)] = string(content)
+		}
+
+		if len(got) != len(want) {
+			t.Errorf("archive has %d entries, want %d", len(got), len(want))
+		}
+		for name, content := range want {
+			if got[name] != content {
+				t.Errorf("entry %s = %q, want %q", name, got[name], content)
+			}
+		}
+	})
+}
+
+func TestInputsDigest(t *testing.T) {
+	tmpDir := t.TempDir()
+	appPath := filepath.Join(tmpDir, "app")
+	licensePath := filepath.Join(tmpDir, "LICENSE.txt")
+	if err := os.WriteFile(appPath, []byte("binary content"), 0o600); err != nil {
+		t.Fatalf("failed to write app file: %v", err)
+	}
+	if err := os.WriteFile(licensePath, []byte("LICENSE content"), 0o600); err != nil {
+		t.Fatalf("failed to write license file: %v", err)
+	}
+
+	first, err := inputsDigest("testplatform", appPath, licensePath)
+	if err != nil {
+		t.Fatalf("inputsDigest failed: %v", err)
+	}
+	second, err := inputsDigest("testplatform", appPath, licensePath)
+	if err != nil {
+		t.Fatalf("inputsDigest failed: %v", err)
+	}
+	if first != second {
+		t.Error("digest not stable across calls with unchanged inputs")
+	}
+
+	if err := os.WriteFile(appPath, []byte("different binary"), 0o600); err != nil {
+		t.Fatalf("failed to rewrite app file: %v", err)
+	}
+	changed, err := inputsDigest("testplatform", appPath, licensePath)
+	if err != nil {
+		t.Fatalf("inputsDigest failed: %v", err)
+	}
+	if changed == first {
+		t.Error("digest unchanged after input content changed")
+	}
+
+	t.Run("changes with compression settings", func(t *testing.T) {
+		t.Setenv("ZAPAROO_ZIP_FORMAT", "store")
+		stored, err := inputsDigest("testplatform", appPath, licensePath)
+		if err != nil {
+			t.Fatalf("inputsDigest failed: %v", err)
+		}
+		if stored == changed {
+			t.Error("digest unchanged after compression settings changed")
+		}
+	})
+
+	t.Run("errors on missing input", func(t *testing.T) {
+		_, err := inputsDigest("testplatform", filepath.Join(tmpDir, "missing"))
+		if err == nil {
+			t.Error("expected error for missing input file, got nil")
+		}
+	})
+}
+
+func TestAddAppBinaryToZip(t *testing.T) {
+	t.Parallel()
+
+	t.Run("caches and reuses the compressed stream", func(t *testing.T) {
+		t.Parallel()
+
+		tmpDir := t.TempDir()
+		content := bytes.Repeat([]byte("app binary payload\x00"), 500)
+		appPath := filepath.Join(tmpDir, "zaparoo")
+		if err := os.WriteFile(appPath, content, 0o600); err != nil {
+			t.Fatalf("failed to write app binary: %v", err)
+		}
+
+		buildZip := func(t *testing.T, zipPath string) {
+			t.Helper()
+			zipFile, err := os.Create(zipPath) //nolint:gosec // Safe: test path from t.TempDir()
+			if err != nil {
+				t.Fatalf("failed to create zip file: %v", err)
+			}
+			zipWriter := zip.NewWriter(zipFile)
+			if err := addAppBinaryToZip(zipWriter, appPath, "zaparoo", zip.Deflate, defaultCompressionLevel); err != nil {
+				t.Fatalf("addAppBinaryToZip failed: %v", err)
+			}
+			if err := zipWriter.Close(); err != nil {
+				t.Fatalf("failed to close zip writer: %v", err)
+			}
+			if err := zipFile.Close(); err != nil {
+				t.Fatalf("failed to close zip file: %v", err)
+			}
+		}
+
+		buildZip(t, filepath.Join(tmpDir, "first.zip"))
+
+		cacheEntries, err := os.ReadDir(filepath.Join(tmpDir, ".deflate_cache"))
+		if err != nil {
+			t.Fatalf("expected deflate cache directory: %v", err)
+		}
+		if len(cacheEntries) != 1 {
+			t.Fatalf("cache has %d entries, want 1", len(cacheEntries))
+		}
+
+		// The second archive is served from the cache; its entry must still
+		// round-trip to the original content.
+		secondPath := filepath.Join(tmpDir, "second.zip")
+		buildZip(t, secondPath)
+
+		reader, err := zip.OpenReader(secondPath)
+		if err != nil {
+			t.Fatalf("failed to open zip: %v", err)
+		}
+		defer func() {
+			_ = reader.Close()
+		}()
+
+		if len(reader.File) != 1 {
+			t.Fatalf("archive has %d entries, want 1", len(reader.File))
+		}
+		entry := reader.File[0]
+		if entry.Method != zip.Deflate {
+			t.Errorf("entry method = %d, want deflate (%d)", entry.Method, zip.Deflate)
+		}
+		rc, err := entry.Open()
+		if err != nil {
+			t.Fatalf("failed to open entry: %v", err)
+		}
+		got, err := io.ReadAll(rc)
+		_ = rc.Close()
+		if err != nil {
+			t.Fatalf("failed to read entry: %v", err)
+		}
+		if !bytes.Equal(got, content) {
+			t.Error("cached entry content does not match the original binary")
+		}
+	})
+
+	t.Run("does not cache stored payloads", func(t *testing.T) {
+		t.Parallel()
+
+		tmpDir := t.TempDir()
+		content := make([]byte, entropySampleSize)
+		_, _ = rand.New(rand.NewSource(7)).Read(content) //nolint:gosec // Safe: test fixture only needs high entropy
+		appPath := filepath.Join(tmpDir, "zaparoo")
+		if err := os.WriteFile(appPath, content, 0o600); err != nil {
+			t.Fatalf("failed to write app binary: %v", err)
+		}
+
+		zipFile, err := os.Create(filepath.Join(tmpDir, "app.zip")) //nolint:gosec // Safe: test path from t.TempDir()
+		if err != nil {
+			t.Fatalf("failed to create zip file: %v", err)
+		}
+		zipWriter := zip.NewWriter(zipFile)
+		if err := addAppBinaryToZip(zipWriter, appPath, "zaparoo", zip.Deflate, defaultCompressionLevel); err != nil {
+			t.Fatalf("addAppBinaryToZip failed: %v", err)
+		}
+		if err := zipWriter.Close(); err != nil {
+			t.Fatalf("failed to close zip writer: %v", err)
+		}
+		if err := zipFile.Close(); err != nil {
+			t.Fatalf("failed to close zip file: %v", err)
+		}
+
+		if _, err := os.Stat(filepath.Join(tmpDir, ".deflate_cache")); !os.IsNotExist(err) {
+			t.Errorf("stored payload should not create a cache directory, stat err = %v", err)
+		}
+	})
+
+	t.Run("prunes stale entries at the same level", func(t *testing.T) {
+		t.Parallel()
+
+		tmpDir := t.TempDir()
+		cacheDir := filepath.Join(tmpDir, ".deflate_cache")
+		if err := os.MkdirAll(cacheDir, 0o750); err != nil {
+			t.Fatalf("failed to create cache directory: %v", err)
+		}
+		staleSameLevel := filepath.Join(cacheDir, fmt.Sprintf("stale-l%d.bin", defaultCompressionLevel))
+		otherLevel := filepath.Join(cacheDir, "other-l9.bin")
+		for _, path := range []string{staleSameLevel, otherLevel} {
+			if err := os.WriteFile(path, []byte("old"), 0o600); err != nil {
+				t.Fatalf("failed to seed cache entry: %v", err)
+			}
+		}
+
+		appPath := filepath.Join(tmpDir, "zaparoo")
+		if err := os.WriteFile(appPath, bytes.Repeat([]byte("payload "), 200), 0o600); err != nil {
+			t.Fatalf("failed to write app binary: %v", err)
+		}
+		zipFile, err := os.Create(filepath.Join(tmpDir, "app.zip")) //nolint:gosec // Safe: test path from t.TempDir()
+		if err != nil {
+			t.Fatalf("failed to create zip file: %v", err)
+		}
+		zipWriter := zip.NewWriter(zipFile)
+		if err := addAppBinaryToZip(zipWriter, appPath, "zaparoo", zip.Deflate, defaultCompressionLevel); err != nil {
+			t.Fatalf("addAppBinaryToZip failed: %v", err)
+		}
+		if err := zipWriter.Close(); err != nil {
+			t.Fatalf("failed to close zip writer: %v", err)
+		}
+		if err := zipFile.Close(); err != nil {
+			t.Fatalf("failed to close zip file: %v", err)
+		}
+
+		if _, err := os.Stat(staleSameLevel); !os.IsNotExist(err) {
+			t.Errorf("stale same-level entry should be pruned, stat err = %v", err)
+		}
+		if _, err := os.Stat(otherLevel); err != nil {
+			t.Errorf("other-level entry should survive pruning: %v", err)
+		}
+	})
+}
+
 func TestCreateTarGzFile(t *testing.T) {
 	t.Parallel()
 
@@ -408,7 +946,7 @@ func TestCreateTarGzFile(t *testing.T) {
 			t.Fatalf("failed to write readme file: %v", err)
 		}
 
-		err := createTarGzFile(tarGzPath, appPath, licensePath, readmePath, "testplatform", tmpDir)
+		err := createTarGzFile(tarGzPath, appPath, licensePath, readmePath, "testplatform")
 		if err != nil {
 			t.Fatalf("createTarGzFile failed: %v", err)
 		}
@@ -451,6 +989,34 @@ func TestCopyFile(t *testing.T) {
 		}
 	})
 
+	t.Run("overwrites existing destination", func(t *testing.T) {
+		t.Parallel()
+
+		tmpDir := t.TempDir()
+		srcPath := filepath.Join(tmpDir, "source.txt")
+		dstPath := filepath.Join(tmpDir, "dest.txt")
+
+		if err := os.WriteFile(srcPath, []byte("new content"), 0o600); err != nil {
+			t.Fatalf("failed to write source file: %v", err)
+		}
+		if err := os.WriteFile(dstPath, []byte("old content"), 0o600); err != nil {
+			t.Fatalf("failed to write destination file: %v", err)
+		}
+
+		if err := copyFile(srcPath, dstPath); err != nil {
+			t.Fatalf("copyFile failed: %v", err)
+		}
+
+		//nolint:gosec // Safe: test code with controlled paths from t.TempDir()
+		readContent, err := os.ReadFile(dstPath)
+		if err != nil {
+			t.Fatalf("failed to read destination file: %v", err)
+		}
+		if string(readContent) != "new content" {
+			t.Errorf("destination content = %q, want %q", readContent, "new content")
+		}
+	})
+
 	t.Run("returns error for nonexistent source", func(t *testing.T) {
 		t.Parallel()
 